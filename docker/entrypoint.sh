@@ -4,6 +4,9 @@
 set -e
 
 echo "Starting HiTech Clan E-Commerce Platform..."
+# One-time deploy tasks (migrations, superuser) live in docker/release.sh;
+# run it once per deploy, not on every container boot. Static files are
+# collected when the image is built
 
 # Wait for database to be ready
 echo "Waiting for database..."
@@ -38,33 +41,6 @@ END
 
 echo "Database is ready!"
 
-# Run database migrations
-echo "Running database migrations..."
-python manage.py makemigrations --noinput
-python manage.py migrate --noinput
-
-# Create superuser if it doesn't exist
-echo "Creating superuser if it doesn't exist..."
-python manage.py shell << END
-from django.contrib.auth import get_user_model
-import os
-
-User = get_user_model()
-username = os.environ.get('DJANGO_SUPERUSER_USERNAME', 'admin')
-email = os.environ.get('DJANGO_SUPERUSER_EMAIL', 'admin@hitechclan.com')
-password = os.environ.get('DJANGO_SUPERUSER_PASSWORD', 'admin123')
-
-if not User.objects.filter(username=username).exists():
-    User.objects.create_superuser(username=username, email=email, password=password)
-    print(f'Superuser {username} created successfully!')
-else:
-    print(f'Superuser {username} already exists.')
-END
-
-# Collect static files
-echo "Collecting static files..."
-python manage.py collectstatic --noinput --clear
-
 echo "Starting application..."
 
 # Execute the main command
@@ -0,0 +1,35 @@
+#!/bin/bash
+
+# One-time database tasks for a deploy (static files are built into the
+# image). Run once per release, before (or while) the new web containers
+# start, e.g.:
+#   docker run --rm --env-file .env <image> bash docker/release.sh
+
+# Exit on any failure
+set -e
+
+echo "Running release tasks..."
+
+# Run database migrations
+echo "Running database migrations..."
+python manage.py migrate --noinput
+
+# Create superuser if it doesn't exist
+echo "Creating superuser if it doesn't exist..."
+python manage.py shell << END
+from django.contrib.auth import get_user_model
+import os
+
+User = get_user_model()
+username = os.environ.get('DJANGO_SUPERUSER_USERNAME', 'admin')
+email = os.environ.get('DJANGO_SUPERUSER_EMAIL', 'admin@hitechclan.com')
+password = os.environ.get('DJANGO_SUPERUSER_PASSWORD', 'admin123')
+
+if not User.objects.filter(username=username).exists():
+    User.objects.create_superuser(username=username, email=email, password=password)
+    print(f'Superuser {username} created successfully!')
+else:
+    print(f'Superuser {username} already exists.')
+END
+
+echo "Release tasks complete."
@@ -0,0 +1,98 @@
+"""
+Gunicorn settings for production.
+
+Run with ``gunicorn -c hitech_store/gunicorn.conf.py``. Every value can be
+overridden from the environment (or .env); set ``GUNICORN_ASGI=True`` to
+serve the ASGI app with uvicorn workers instead of threaded WSGI workers.
+"""
+import math
+import os
+import shutil
+
+# `config` is itself a gunicorn setting, so import decouple's under another name
+from decouple import config as env
+
+
+def available_cpus():
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as limits:
+            quota, period = limits.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+cpus = available_cpus()
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Requests mostly wait on the database and Paystack, so each process also
+# runs a couple of threads. Under ASGI Django runs sync views on one thread
+# per process, so the process count is the same either way.
+asgi = env('GUNICORN_ASGI', default=False, cast=bool)
+# Capped by default: each worker holds its own database connections, and a
+# large host would otherwise exhaust PostgreSQL's max_connections
+worker_cap = env('GUNICORN_MAX_WORKERS', default=9, cast=int)
+workers = env('GUNICORN_WORKERS', default=min(2 * cpus + 1, worker_cap), cast=int)
+threads = env('GUNICORN_THREADS', default=2, cast=int)
+if asgi:
+    wsgi_app = 'hitech_store.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'hitech_store.wsgi:application'
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import Django once in the master so workers fork warm and start instantly
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Recycle workers periodically to cap slow memory growth; jitter avoids all
+# workers restarting at once
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Heartbeat files on tmpfs, not the container's overlay filesystem
+worker_tmp_dir = env('GUNICORN_WORKER_TMP_DIR', default='/dev/shm')
+
+# Workers write their Prometheus metrics here so /metrics sums all of them.
+# Set up while the config loads: that is before the app (and prometheus_client)
+# is imported, even with preload_app. Files left by a previous run would be
+# added to this run's totals, so start empty.
+prometheus_dir = env('PROMETHEUS_MULTIPROC_DIR', default='/dev/shm/hitech_store_metrics')
+if prometheus_dir:
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = prometheus_dir
+
+accesslog = env('GUNICORN_ACCESS_LOG', default='-')
+errorlog = '-'
+loglevel = env('GUNICORN_LOG_LEVEL', default='info')
+
+
+def on_starting(server):
+    # Catalog invalidation only reaches the worker that saved the product
+    # when each worker has its own in-memory cache
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hitech_store.settings')
+    from django.conf import settings
+    if server.cfg.workers > 1 and settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        raise RuntimeError('CACHE_BACKEND=locmem is per process; use file or redis with several workers')
+
+
+def child_exit(server, worker):
+    if prometheus_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Never share database sockets opened in the master while preloading
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
@@ -11,12 +11,16 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# `manage.py test` swaps a few shared backends for private in-process ones
+TESTING = 'test' in sys.argv[1:2]
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -44,7 +48,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.timing.RequestTimingMiddleware',
+    'store.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files with far-future caching for hashed names
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +66,8 @@ ROOT_URLCONF = 'hitech_store.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to store.timing
+        'BACKEND': 'store.timing.TimedDjangoTemplates',
         'DIRS': [
             BASE_DIR / 'templates',
         ],
@@ -68,6 +77,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'store.context_processors.cart_count',
             ],
         },
     },
@@ -75,21 +85,93 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'hitech_store.wsgi.application'
 
+# Request timing (see store.timing): Server-Timing headers and a log line for slow requests
+REQUEST_TIMING = config('REQUEST_TIMING', default=True, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+
+# Prometheus metrics at /metrics (see store.metrics); scrapers send "Authorization: Bearer <token>" when set
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DB_ENGINE = config('DB_ENGINE', default='django.db.backends.sqlite3')
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+# Served through uvicorn workers (see gunicorn.conf.py)
+GUNICORN_ASGI = config('GUNICORN_ASGI', default=False, cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': config('DB_ENGINE', default='django.db.backends.sqlite3'),
-        'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3'),
+        'ENGINE': DB_ENGINE,
+        # SQLite takes a file path; server databases take a plain name
+        'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3')
+        if DB_ENGINE == 'django.db.backends.sqlite3' else config('DB_NAME', default='hitech_store'),
         'USER': config('DB_USER', default=''),
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default=''),
         'PORT': config('DB_PORT', default=''),
+        # Keep connections open across requests instead of reconnecting each time;
+        # health checks replace a connection the server dropped while it was idle.
+        # Under ASGI each request runs its queries on a fresh executor thread, so
+        # persistent connections would pile up unclosed: close them, or use DB_POOL
+        'CONN_MAX_AGE': 0 if DB_POOL or GUNICORN_ASGI else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# Optional psycopg 3 connection pool (PostgreSQL only), shared by a worker's threads
+if DB_POOL and DB_ENGINE == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+
+# Trigram lookups used by product search
+if DB_ENGINE == 'django.db.backends.postgresql':
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+
+# Cache
+# locmem is per-process: fine for runserver, but workers would each keep their
+# own entries and miss each other's invalidations, so anything else defaults
+# to 'file' (one host); use 'redis' across hosts. gunicorn.conf.py refuses to
+# start several workers on locmem.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'hitech-store'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/var/tmp/hitech_store_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+# Tests always get a private in-memory cache
+CACHE_BACKEND = 'locmem' if TESTING else config('CACHE_BACKEND', default='locmem' if DEBUG else 'file')
+CACHE_TIMEOUT = config('CACHE_TIMEOUT', default=300, cast=int)
+_cache_class, _cache_location = CACHE_BACKENDS[CACHE_BACKEND]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_class,
+        'LOCATION': config('CACHE_LOCATION', default=_cache_location),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='hitech'),
+        'TIMEOUT': CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+        if CACHE_BACKEND in ('locmem', 'file') else {},
+    }
+}
+
+
+# Sessions
+# Kept in the cache (or signed_cookies) so guest carts and bots never write
+# django_session rows; sessions then count towards CACHE_MAX_ENTRIES. The
+# store.W001 check flags the db engine paired with session guest carts.
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cache')
+
+# Where anonymous carts live: 'session' (no CartItem rows) or 'db' (rows keyed by session_key)
+GUEST_CART_STORAGE = config('GUEST_CART_STORAGE', default='session')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,9 +213,36 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies of every file, Brotli (.br) and
+# gzip (.gz) variants and a manifest mapping original names to hashed ones.
+# The Docker image runs it at build time, without .env, so images always use
+# the default. Tests never run collectstatic, so they use plain names.
+STATICFILES_BACKEND = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage' if TESTING
+    else config('STATICFILES_BACKEND', default='whitenoise.storage.CompressedManifestStaticFilesStorage')
+)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': STATICFILES_BACKEND},
+}
+
 MEDIA_URL = config('MEDIA_URL', default='/media/')
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Product image derivatives (see store.images)
+PRODUCT_IMAGE_WIDTHS = config('PRODUCT_IMAGE_WIDTHS', default='250,500,1000', cast=Csv(int))
+PRODUCT_IMAGE_ASYNC = config('PRODUCT_IMAGE_ASYNC', default=True, cast=bool)
+PRODUCT_IMAGE_WORKERS = config('PRODUCT_IMAGE_WORKERS', default=2, cast=int)
+
+# Storefront catalog
+CATALOG_PAGE_SIZE = config('CATALOG_PAGE_SIZE', default=24, cast=int)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+SEARCH_RESULTS_LIMIT = config('SEARCH_RESULTS_LIMIT', default=48, cast=int)
+LOW_STOCK_THRESHOLD = config('LOW_STOCK_THRESHOLD', default=10, cast=int)
+ADMIN_PAGE_SIZE = config('ADMIN_PAGE_SIZE', default=50, cast=int)
+ORDER_HISTORY_PAGE_SIZE = config('ORDER_HISTORY_PAGE_SIZE', default=10, cast=int)
+PROFILE_RECENT_ORDERS = config('PROFILE_RECENT_ORDERS', default=5, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -143,6 +252,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Payment Gateway Settings
 PAYSTACK_PUBLIC_KEY = config('PAYSTACK_PUBLIC_KEY')
 PAYSTACK_SECRET_KEY = config('PAYSTACK_SECRET_KEY')
+PAYSTACK_BASE_URL = config('PAYSTACK_BASE_URL', default='https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = config('PAYSTACK_CONNECT_TIMEOUT', default=3.05, cast=float)
+PAYSTACK_READ_TIMEOUT = config('PAYSTACK_READ_TIMEOUT', default=10, cast=float)
+PAYSTACK_MAX_RETRIES = config('PAYSTACK_MAX_RETRIES', default=3, cast=int)
+PAYSTACK_RETRY_BACKOFF = config('PAYSTACK_RETRY_BACKOFF', default=0.5, cast=float)
+PAYSTACK_POOL_SIZE = config('PAYSTACK_POOL_SIZE', default=10, cast=int)
 
 # Authentication URLs
 LOGIN_URL = '/login/'
@@ -171,7 +286,8 @@ if not DEBUG:
     SECURE_HSTS_SECONDS = config('SECURE_HSTS_SECONDS', default=31536000, cast=int)
     SECURE_HSTS_INCLUDE_SUBDOMAINS = config('SECURE_HSTS_INCLUDE_SUBDOMAINS', default=True, cast=bool)
     SECURE_HSTS_PRELOAD = config('SECURE_HSTS_PRELOAD', default=True, cast=bool)
-    SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
+    # The test client speaks plain http; redirecting it would leave every view untested
+    SECURE_SSL_REDIRECT = not TESTING and config('SECURE_SSL_REDIRECT', default=True, cast=bool)
     SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=True, cast=bool)
     CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', default=True, cast=bool)    # Use an official Python runtime as a parent image
    
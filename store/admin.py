@@ -1,5 +1,7 @@
 from django.contrib import admin
 from .models import Product, CartItem, Order, OrderItem
+from .search import search_queryset
+from .images import schedule_derivatives
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -8,6 +10,17 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the trigram/FTS indexes instead of unindexed LIKE scans
+        if not search_term:
+            return queryset, False
+        return search_queryset(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.image and 'image' in form.changed_data:
+            schedule_derivatives(obj)
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
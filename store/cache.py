@@ -0,0 +1,159 @@
+"""
+Caching helpers on top of the configured ``CACHES['default']``.
+
+Keys are ``<prefix>:...``; each prefix keeps hit/miss/eviction counters in
+the cache itself. With a shared backend (file or redis, see settings) every
+worker reports the same numbers and sees the same invalidations. Namespaces
+are versioned: bumping a namespace's version orphans all of its keys at
+once, which is how the catalog is invalidated.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
+
+from .metrics import CACHE_LOOKUPS
+
+VERSION_KEY = 'cache:version:{}'
+STATS_KEY = 'cache:stats:{}:{}'
+PREFIXES_KEY = 'cache:stats:prefixes'
+# Written alongside each entry with the same timeout; an entry that is gone
+# while its marker is still there was evicted before it expired
+MARKER_KEY = 'cache:set:{}'
+STAT_FIELDS = ('hits', 'misses', 'evictions')
+
+_known_prefixes = set()
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _record(prefix, field):
+    if prefix not in _known_prefixes:
+        _known_prefixes.add(prefix)
+        prefixes = cache.get(PREFIXES_KEY, set())
+        if prefix not in prefixes:
+            cache.set(PREFIXES_KEY, prefixes | {prefix}, None)
+    _incr(STATS_KEY.format(prefix, field))
+    CACHE_LOOKUPS.labels(prefix, field).inc()
+
+
+def cache_stats():
+    """Return ``{prefix: {hits, misses, evictions, hit_rate}}`` for every prefix seen so far."""
+    prefixes = sorted(cache.get(PREFIXES_KEY, set()) | _known_prefixes)
+    counters = cache.get_many([STATS_KEY.format(prefix, field) for prefix in prefixes for field in STAT_FIELDS])
+    stats = {}
+    for prefix in prefixes:
+        values = {field: counters.get(STATS_KEY.format(prefix, field), 0) for field in STAT_FIELDS}
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] * 100 / lookups, 1) if lookups else 0
+        stats[prefix] = values
+    return stats
+
+
+def version(namespace):
+    key = VERSION_KEY.format(namespace)
+    current = cache.get(key)
+    if current is None:
+        # Seed from the clock so a lost version key never resurrects old entries
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def bump_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, str(version(namespace)), *map(str, parts)])
+
+
+def get_or_build(key, build, timeout=None):
+    """Return the cached value for ``key``, calling ``build()`` and storing its result on a miss."""
+    prefix = key.split(':', 1)[0]
+    marker = MARKER_KEY.format(key)
+    found = cache.get_many([key, marker])
+    if key in found:
+        _record(prefix, 'hits')
+        return found[key]
+
+    _record(prefix, 'misses')
+    if marker in found:
+        _record(prefix, 'evictions')
+    value = build()
+    timeout = settings.CACHE_TIMEOUT if timeout is None else timeout
+    cache.set_many({key: value, marker: True}, timeout)
+    return value
+
+
+def delete(keys):
+    cache.delete_many([name for key in keys for name in (key, MARKER_KEY.format(key))])
+
+
+def cache_view(namespace, timeout=None):
+    """
+    Cache a view's responses under ``namespace``'s current version.
+
+    Built on ``cache_page``. Responses always vary on ``Cookie``: the page
+    shows the visitor's cart and messages, and the session middleware's own
+    ``Vary`` is added too late for ``cache_page`` to see it. Visitors without
+    cookies share one entry.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            built = []
+
+            def build(request, *args, **kwargs):
+                built.append(True)
+                return view(request, *args, **kwargs)
+
+            cached_view = cache_page(
+                settings.CACHE_TIMEOUT if timeout is None else timeout,
+                key_prefix=f'view:{namespace}:{version(namespace)}',
+            )(vary_on_cookie(build))
+            response = cached_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                _record('view', 'misses' if built else 'hits')
+            return response
+        return wrapper
+    return decorator
+
+
+# Storefront catalog
+
+def cached_fragment(key, build):
+    return get_or_build(key, build, settings.CATALOG_CACHE_TIMEOUT)
+
+
+def catalog_grid(cursor, build):
+    return cached_fragment(versioned_key('catalog', 'grid', cursor or 'first'), build)
+
+
+def product_fragment(slug, build):
+    return cached_fragment(f'catalog:product:{slug}', build)
+
+
+def invalidate_catalog():
+    bump_version('catalog')
+
+
+def invalidate_product(slug):
+    invalidate_products([slug])
+
+
+def invalidate_products(slugs):
+    delete([f'catalog:product:{slug}' for slug in slugs])
+    invalidate_catalog()
@@ -0,0 +1,205 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, F, Sum
+
+from .models import CartItem, Product
+
+CART_COUNT_SESSION_KEY = 'cart_count'
+# Guest carts live in the session as {product_id: quantity}; see GUEST_CART_STORAGE
+GUEST_CART_SESSION_KEY = 'guest_cart'
+
+
+class CartSummary:
+    """Cart lines plus their DB-computed totals, ready for templates."""
+
+    def __init__(self, lines, subtotal=Decimal('0.00'), item_count=0):
+        self.lines = lines
+        self.subtotal = subtotal
+        self.item_count = item_count
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def total(self):
+        return self.subtotal
+
+
+def uses_guest_cart(request):
+    return not request.user.is_authenticated and settings.GUEST_CART_STORAGE == 'session'
+
+
+def _guest_cart(request):
+    return request.session.get(GUEST_CART_SESSION_KEY, {})
+
+
+def _save_guest_cart(request, items):
+    request.session[GUEST_CART_SESSION_KEY] = items
+    request.session[CART_COUNT_SESSION_KEY] = len(items)
+
+
+def get_cart_items(request):
+    if request.user.is_authenticated:
+        return CartItem.objects.filter(user=request.user)
+    else:
+        session_key = request.session.session_key
+        if not session_key:
+            request.session.create()
+            session_key = request.session.session_key
+        return CartItem.objects.filter(session_key=session_key)
+
+
+def _get_guest_cart(request):
+    items = _guest_cart(request)
+    products = Product.objects.in_bulk([int(product_id) for product_id in items])
+    # Unsaved CartItems keyed by product id, so templates and cart URLs work unchanged
+    lines = [
+        CartItem(id=int(product_id), product=products[int(product_id)], quantity=quantity)
+        for product_id, quantity in items.items()
+        if int(product_id) in products
+    ]
+    if len(lines) != len(items):
+        # Drop products that were deleted since they were added
+        _save_guest_cart(request, {str(line.product_id): line.quantity for line in lines})
+    return CartSummary(
+        lines,
+        sum((line.total_price for line in lines), Decimal('0.00')),
+        sum(line.quantity for line in lines),
+    )
+
+
+def get_cart(request):
+    """Load the cart lines with their products and total them in one aggregate query."""
+    if uses_guest_cart(request):
+        return _get_guest_cart(request)
+    items = get_cart_items(request)
+    lines = list(items.select_related('product'))
+    if not lines:
+        return CartSummary(lines)
+    totals = items.aggregate(
+        subtotal=Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        item_count=Sum('quantity'),
+    )
+    return CartSummary(lines, totals['subtotal'], totals['item_count'])
+
+
+def add_item(request, product, quantity):
+    if uses_guest_cart(request):
+        items = _guest_cart(request)
+        key = str(product.id)
+        items[key] = items.get(key, 0) + quantity
+        _save_guest_cart(request, items)
+        return
+
+    if request.user.is_authenticated:
+        cart_item, created = CartItem.objects.get_or_create(
+            user=request.user,
+            product=product,
+            defaults={'quantity': quantity}
+        )
+    else:
+        session_key = request.session.session_key
+        if not session_key:
+            request.session.create()
+            session_key = request.session.session_key
+        cart_item, created = CartItem.objects.get_or_create(
+            session_key=session_key,
+            product=product,
+            defaults={'quantity': quantity}
+        )
+    if created:
+        adjust_cart_count(request, 1)
+    else:
+        cart_item.quantity = F('quantity') + quantity
+        cart_item.save(update_fields=['quantity'])
+
+
+def update_item(request, item_id, quantity):
+    """Set a line's quantity, removing it at zero. Returns False if the line isn't in this cart."""
+    if quantity <= 0:
+        return remove_item(request, item_id)
+    if uses_guest_cart(request):
+        items = _guest_cart(request)
+        if str(item_id) not in items:
+            return False
+        items[str(item_id)] = quantity
+        _save_guest_cart(request, items)
+        return True
+    return get_cart_items(request).filter(id=item_id).update(quantity=quantity) > 0
+
+
+def remove_item(request, item_id):
+    """Remove a line. Returns False if the line isn't in this cart."""
+    if uses_guest_cart(request):
+        items = _guest_cart(request)
+        if items.pop(str(item_id), None) is None:
+            return False
+        _save_guest_cart(request, items)
+        return True
+    deleted, _ = get_cart_items(request).filter(id=item_id).delete()
+    if deleted:
+        adjust_cart_count(request, -1)
+    return deleted > 0
+
+
+def merge_guest_cart(request, user):
+    """
+    Fold the session's guest cart into ``user``'s DB cart.
+
+    Reads the user's matching lines once, then writes every line in a single
+    bulk upsert on the (user, product) unique constraint.
+    """
+    items = request.session.pop(GUEST_CART_SESSION_KEY, None)
+    if not items:
+        return
+    quantities = {int(product_id): quantity for product_id, quantity in items.items()}
+    existing = dict(
+        CartItem.objects.filter(user=user, product_id__in=quantities).values_list('product_id', 'quantity')
+    )
+    product_ids = Product.objects.filter(pk__in=quantities).values_list('pk', flat=True)
+    CartItem.objects.bulk_create(
+        [
+            CartItem(user=user, product_id=product_id, quantity=existing.get(product_id, 0) + quantities[product_id])
+            for product_id in product_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'product'],
+        update_fields=['quantity'],
+    )
+
+
+def refresh_cart_count(request):
+    count = get_cart_items(request).count()
+    request.session[CART_COUNT_SESSION_KEY] = count
+    return count
+
+
+def adjust_cart_count(request, delta):
+    # A missing count is recomputed lazily by cached_cart_count()
+    count = request.session.get(CART_COUNT_SESSION_KEY)
+    if count is not None:
+        request.session[CART_COUNT_SESSION_KEY] = max(count + delta, 0)
+
+
+def set_cart_count(request, count):
+    request.session[CART_COUNT_SESSION_KEY] = count
+
+
+def cached_cart_count(request):
+    """Return the badge count from the session, querying only the first time."""
+    if uses_guest_cart(request):
+        return len(_guest_cart(request))
+    count = request.session.get(CART_COUNT_SESSION_KEY)
+    if count is None:
+        # Don't start a session just to learn that a new visitor's cart is empty
+        if not request.user.is_authenticated and not request.session.session_key:
+            return 0
+        count = refresh_cart_count(request)
+    return count
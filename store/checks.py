@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_guest_cart_sessions(app_configs, **kwargs):
+    # Session guest carts exist to spare the database a write per visitor
+    if settings.GUEST_CART_STORAGE == 'session' and settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+        return [Warning(
+            'GUEST_CART_STORAGE=session with a database SESSION_ENGINE writes a django_session row '
+            'for every visitor who touches the cart.',
+            hint='Use django.contrib.sessions.backends.cache or signed_cookies.',
+            id='store.W001',
+        )]
+    return []
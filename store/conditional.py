@@ -0,0 +1,39 @@
+"""
+ETag validators for the storefront pages.
+
+Used with Django's ``condition`` decorator, so a repeat visit answers 304
+after one indexed lookup of ``Product.updated_at`` and no rendering. The
+pages show who is logged in and their cart count, so the ETag also carries
+the user, the cart count and the catalog cache version. The version changes
+on every product save and delete, and a delete never raises the newest
+``updated_at``. There is no ``Last-Modified``: a date alone can't say who
+is looking or that a product was deleted, and clients that revalidate by
+date only would be told a changed page is unchanged. Pages with a pending
+flash message are always rendered, so the message is shown.
+"""
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.db.models import Max
+
+from . import cache as catalog_cache
+from .cart import cached_cart_count
+from .models import Product
+
+
+def _etag(request, updated_at):
+    """Return the ETag for a page last changed at ``updated_at``, or ``None``."""
+    if updated_at is None or len(get_messages(request)):
+        return None
+    user = request.user.pk if request.user.is_authenticated else 'anonymous'
+    variant = f'{updated_at.isoformat()}:{catalog_cache.version("catalog")}:{user}:{cached_cart_count(request)}'
+    # Weak: each render carries a fresh CSRF mask, so equal pages differ byte for byte
+    return f'W/"{hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def catalog_etag(request, *args, **kwargs):
+    return _etag(request, Product.objects.aggregate(latest=Max('updated_at'))['latest'])
+
+
+def product_etag(request, slug):
+    return _etag(request, Product.objects.filter(slug=slug).values_list('updated_at', flat=True).first())
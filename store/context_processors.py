@@ -1,11 +1,4 @@
-from .models import CartItem
+from .cart import cached_cart_count
 
 def cart_count(request):
-    count = 0
-    if request.user.is_authenticated:
-        count = CartItem.objects.filter(user=request.user).count()
-    else:
-        session_key = request.session.session_key
-        if session_key:
-            count = CartItem.objects.filter(session_key=session_key).count()
-    return {'cart_count': count}
\ No newline at end of file
+    return {'cart_count': cached_cart_count(request)}
@@ -121,3 +121,26 @@ class ProductForm(forms.ModelForm):
             'image': forms.FileInput(attrs={'class': 'form-control'}),
             'stock': forms.NumberInput(attrs={'class': 'form-control'}),
         }
+
+class OrderFilterForm(forms.Form):
+    PAYMENT_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    q = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Order # or email'}))
+    status = forms.ChoiceField(required=False, choices=[('', 'Any status')] + Order.STATUS_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
+    payment_status = forms.ChoiceField(required=False, choices=[('', 'Any payment')] + PAYMENT_STATUS_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+
+class ProductFilterForm(forms.Form):
+    STOCK_CHOICES = [
+        ('', 'Any stock'),
+        ('low', 'Low stock'),
+        ('out', 'Out of stock'),
+    ]
+
+    q = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Search products'}))
+    stock = forms.ChoiceField(required=False, choices=STOCK_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
@@ -0,0 +1,112 @@
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps
+
+from .cache import invalidate_product
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# (Pillow format, file extension, save options)
+DERIVATIVE_FORMATS = (
+    ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+)
+PLACEHOLDER_WIDTH = 16
+
+_executor = None
+
+
+def derivative_name(image_name, width, extension):
+    stem = os.path.splitext(image_name)[0]
+    return f'{stem}-{width}w.{extension}'
+
+
+def _save(name, image, image_format, options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def _placeholder(image):
+    tiny = image.copy()
+    tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def generate_derivatives(image_name):
+    """
+    Write fixed-width JPEG and WebP copies of ``image_name`` next to it.
+
+    Returns the ``Product.image_variants`` payload. Touches storage only, so it
+    is safe to run in a worker process without a database connection.
+    """
+    with default_storage.open(image_name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGB')
+
+    widths = []
+    for width in settings.PRODUCT_IMAGE_WIDTHS:
+        # Never upscale, but always emit the smallest size
+        if widths and width > image.width:
+            break
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for image_format, extension, options in DERIVATIVE_FORMATS:
+            _save(derivative_name(image_name, width, extension), resized, image_format, options)
+        widths.append(width)
+
+    return {
+        'source': image_name,
+        'widths': widths,
+        'aspect_ratio': round(image.width / image.height, 4),
+        'placeholder': _placeholder(image),
+    }
+
+
+def process_product_image(product_id):
+    product = Product.objects.filter(pk=product_id).values('slug', 'image').first()
+    if not product or not product['image']:
+        return
+    variants = generate_derivatives(product['image'])
+    # Skip the write if the image was replaced while we were working
+    updated = Product.objects.filter(pk=product_id, image=product['image']).update(image_variants=variants, updated_at=timezone.now())
+    if updated:
+        invalidate_product(product['slug'])
+
+
+def _run_in_background(product_id):
+    try:
+        process_product_image(product_id)
+    except Exception:
+        logger.exception('Image derivative generation failed for product %s', product_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(product):
+    """Generate derivatives for ``product`` once the current transaction commits."""
+    global _executor
+    if not settings.PRODUCT_IMAGE_ASYNC:
+        transaction.on_commit(lambda: process_product_image(product.pk))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PRODUCT_IMAGE_WORKERS,
+            thread_name_prefix='product-images',
+        )
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, product.pk))
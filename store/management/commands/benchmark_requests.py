@@ -0,0 +1,100 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = ('Measure requests/sec for storefront pages in-process, once per CONN_MAX_AGE value, '
+            'to show what reconnecting on every request costs')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', dest='paths', action='append',
+                            help='Path to request; repeatable (default: / and the newest product page)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path and thread')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads')
+        parser.add_argument('--conn-max-age', type=int, nargs='+',
+                            help='CONN_MAX_AGE values to compare (default: 0 and the configured value)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.default_paths()
+        database = settings.DATABASES['default']
+        ages = options['conn_max_age'] or sorted({0, database['CONN_MAX_AGE']})
+        self.stdout.write(
+            f"{database['ENGINE']} pool={'pool' in database.get('OPTIONS', {})} "
+            f"threads={options['concurrency']} requests={options['requests']}"
+        )
+        # Requests go through the real WSGI handler rather than django.test.Client,
+        # which unhooks the request_started/finished handlers that close connections
+        self.handler = WSGIHandler()
+        self.factory = RequestFactory()
+        connection_created.connect(self.count_connection)
+        try:
+            for path in paths:
+                for age in ages:
+                    # Threads open their connections from this dict, so the new age applies to them
+                    connections.settings['default']['CONN_MAX_AGE'] = age
+                    self.connections = 0
+                    rate, latencies = self.run(path, options['requests'], options['concurrency'])
+                    quantiles = statistics.quantiles(latencies, n=100)
+                    self.stdout.write(
+                        f'{path:<24} CONN_MAX_AGE={age:<5} {rate:8.1f} req/s  '
+                        f'p50={quantiles[49]:.1f}ms p95={quantiles[94]:.1f}ms  connections={self.connections}'
+                    )
+        finally:
+            connection_created.disconnect(self.count_connection)
+            connections.settings['default']['CONN_MAX_AGE'] = database['CONN_MAX_AGE']
+
+    def default_paths(self):
+        # Both pages look the catalog up on every request, even when their HTML is cached
+        product = Product.objects.order_by('-created_at').first()
+        if product is None:
+            raise CommandError('No products to request; pass --path or import some first.')
+        return ['/', product.get_absolute_url()]
+
+    def count_connection(self, sender, connection, **kwargs):
+        self.connections += 1
+
+    def get(self, path):
+        # https, so SECURE_SSL_REDIRECT doesn't turn every request into a query-less redirect
+        environ = self.factory.get(path, secure=True).environ
+        statuses = []
+        response = self.handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        for _ in response:
+            pass
+        # Sends request_finished, which closes connections older than CONN_MAX_AGE
+        response.close()
+        return int(statuses[0].split()[0])
+
+    def run(self, path, requests, concurrency):
+        status = self.get(path)  # warm up: URL resolver, templates, caches
+        if status != 200:
+            raise CommandError(f'{path} answered {status}, not 200')
+        latencies = []
+        lock = threading.Lock()
+
+        def worker():
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                self.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(timings)
+            connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(latencies) / (time.perf_counter() - started), latencies
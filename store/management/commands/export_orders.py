@@ -0,0 +1,43 @@
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from store.exports import EXPORT_FORMATS, order_item_rows, stream_export
+from store.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Stream orders and their line items to CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--status', choices=[value for value, _ in Order.STATUS_CHOICES])
+        parser.add_argument('--payment-status')
+        parser.add_argument('--from', dest='date_from', type=date.fromisoformat,
+                            help='First order date to include (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=date.fromisoformat,
+                            help='Last order date to include (YYYY-MM-DD)')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        rows = order_item_rows(
+            status=options['status'],
+            payment_status=options['payment_status'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+        )
+        started = time.perf_counter()
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in stream_export(rows, options['format']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {options['output']} in {time.perf_counter() - started:.1f}s"
+            ))
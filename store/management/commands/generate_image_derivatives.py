@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from store.cache import invalidate_products
+from store.images import generate_derivatives
+from store.models import Product
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Generate resized/WebP derivatives and blur placeholders for existing product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate derivatives that are already up to date')
+
+    def handle(self, *args, **options):
+        products = (
+            Product.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('id', 'slug', 'image', 'image_variants')
+        )
+        # Products can share an image file: generate it once, then update all of them
+        pending = {}
+        for pk, slug, image, variants in products.iterator():
+            if options['force'] or (variants or {}).get('source') != image:
+                pending.setdefault(image, {})[pk] = slug
+        if not pending:
+            self.stdout.write('All product images are up to date.')
+            return
+
+        self.stdout.write(f"Processing {len(pending)} images with {options['workers']} workers...")
+        # Workers only touch storage; don't let them inherit open DB connections
+        connections.close_all()
+        done, failed, slugs = 0, 0, []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = {executor.submit(generate_derivatives, image): image for image in pending}
+            for future in as_completed(futures):
+                image = futures[future]
+                owners = pending[image]
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{image}: {exc}')
+                    continue
+                # Skip products whose image was replaced while we were working
+                updated = Product.objects.filter(pk__in=owners, image=image)
+                slugs += [owners[pk] for pk in updated.values_list('pk', flat=True)]
+                updated.update(image_variants=variants, updated_at=timezone.now())
+                done += 1
+
+        if slugs:
+            invalidate_products(slugs)
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {done} images ({failed} failed).'))
@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from store.cache import invalidate_products
+from store.models import Product
+from store.stats import rebuild_stats
+
+UPDATE_FIELDS = ['name', 'description', 'price', 'stock', 'image', 'updated_at']
+
+
+def _read_rows(path, file_format):
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Create or update products in bulk from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file with name, description, price, stock '
+                                         'and optional slug and image columns')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--match', choices=['slug', 'name'], default='slug',
+                            help='Column that identifies an existing product to update (default: slug; '
+                                 'rows without a slug match on the slug their name would get)')
+        parser.add_argument('--images-dir',
+                            help='Directory holding the files named in the image column; '
+                                 'without it the image column is ignored')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.match = options['match']
+        self.images_dir = options['images_dir']
+
+        started = time.perf_counter()
+        self.created = self.updated = self.skipped = self.images = 0
+        self.slugs = set()
+        rows = enumerate(_read_rows(path, file_format), 1)
+        for batch in _batches(rows, options['batch_size']):
+            self.import_batch(batch)
+
+        if self.created or self.updated:
+            # bulk_create/bulk_update skip save() and its signals
+            rebuild_stats()
+            # Product pages are cached by slug, outside the catalog version
+            invalidate_products(self.slugs)
+        if self.images:
+            call_command('generate_image_derivatives', stdout=self.stdout)
+
+        elapsed = time.perf_counter() - started
+        total = self.created + self.updated + self.skipped
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.created} created, {self.updated} updated, {self.skipped} skipped '
+            f'in {elapsed:.1f}s ({total / elapsed if elapsed else total:.0f} rows/sec)'
+        ))
+
+    def parse_row(self, line, row):
+        try:
+            name = row['name'].strip()
+            if not name:
+                raise ValueError('name is empty')
+            return {
+                'line': line,
+                'name': name,
+                'description': (row.get('description') or '').strip(),
+                'price': Decimal(str(row['price'])),
+                'stock': max(int(row.get('stock') or 0), 0),
+                'slug': (row.get('slug') or '').strip(),
+                'image': (row.get('image') or '').strip(),
+            }
+        except (KeyError, ValueError, InvalidOperation) as exc:
+            self.stderr.write(f'Line {line}: skipped ({exc!r})')
+            self.skipped += 1
+            return None
+
+    def attach_image(self, product, image):
+        if not (self.images_dir and image):
+            return
+        source = os.path.join(self.images_dir, image)
+        if not os.path.exists(source):
+            self.stderr.write(f'{product.name}: image {source} not found')
+            return
+        with open(source, 'rb') as fh:
+            product.image.name = default_storage.save(
+                product.image.field.generate_filename(product, os.path.basename(image)), File(fh)
+            )
+        self.images += 1
+
+    def key(self, data):
+        if self.match == 'slug':
+            # Without a slug, re-importing the same file must update, not duplicate
+            return data['slug'] or Product.objects.base_slug(data['name'])
+        return data['name']
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        parsed = [data for data in (self.parse_row(line, row) for line, row in batch) if data]
+        keys = {self.key(data) for data in parsed}
+        # New products keep their explicit slug only if no other product has it;
+        # fetch those owners in the same query as the products to update
+        lookup = Q(**{f'{self.match}__in': keys})
+        if self.match == 'name':
+            lookup |= Q(slug__in={data['slug'] for data in parsed if data['slug']})
+        existing, slugs_taken = {}, set()
+        for product in Product.objects.filter(lookup).order_by('id'):
+            slugs_taken.add(product.slug)
+            if getattr(product, self.match) in keys:
+                existing.setdefault(getattr(product, self.match), product)
+
+        to_create, to_update = [], {}
+        now = timezone.now()
+        for data in parsed:
+            key = self.key(data)
+            product = existing.get(key)
+            if product is None:
+                if data['slug'] in slugs_taken:
+                    self.stderr.write(f"Line {data['line']}: skipped (slug {data['slug']!r} belongs to another product)")
+                    self.skipped += 1
+                    continue
+                if data['slug']:
+                    slugs_taken.add(data['slug'])
+                product = Product(slug=data['slug'])
+                to_create.append(product)
+                # A later row with the same key updates this one
+                existing[key] = product
+            elif product.pk:
+                to_update[product.pk] = product
+            product.name = data['name']
+            product.description = data['description']
+            product.price = data['price']
+            product.stock = data['stock']
+            product.updated_at = now
+            self.attach_image(product, data['image'])
+
+        # Products named in the file without a slug get one, collision-free across the batch
+        unslugged = [product for product in to_create if not product.slug]
+        explicit = [product.slug for product in to_create if product.slug]
+        for product, slug in zip(unslugged, Product.objects.unique_slugs([p.name for p in unslugged], explicit)):
+            product.slug = slug
+
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update.values(), UPDATE_FIELDS)
+        self.slugs.update(product.slug for product in [*to_create, *to_update.values()])
+        self.created += len(to_create)
+        self.updated += len(to_update)
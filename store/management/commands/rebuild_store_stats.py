@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the admin dashboard statistics from the product and order tables'
+
+    def handle(self, *args, **options):
+        stats = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats.total_products} products ({stats.low_stock_products} low stock), '
+            f'{stats.total_orders} orders ({stats.pending_orders} pending)'
+        ))
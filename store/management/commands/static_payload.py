@@ -0,0 +1,55 @@
+import os
+from collections import defaultdict
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+VARIANTS = ('raw', 'gzip', 'brotli')
+
+
+class Command(BaseCommand):
+    help = ('Report the size of the collected static assets (as served, by file type and compression) '
+            'from the staticfiles manifest; run after collectstatic')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='List the N largest assets (default: 10)')
+        parser.add_argument('--budget', type=int, metavar='KB',
+                            help='Fail if the smallest encoding of all assets together exceeds KB kilobytes')
+
+    def handle(self, *args, **options):
+        if not hasattr(staticfiles_storage, 'load_manifest'):
+            raise CommandError('STATICFILES_BACKEND has no manifest; only a manifest storage can be reported on.')
+        paths, _ = staticfiles_storage.load_manifest()
+        if not paths:
+            raise CommandError('No staticfiles manifest found. Run collectstatic first.')
+
+        totals = defaultdict(lambda: dict.fromkeys(VARIANTS, 0))
+        assets = []
+        for name, hashed_name in paths.items():
+            path = staticfiles_storage.path(hashed_name)
+            if not os.path.exists(path):
+                continue
+            sizes = {'raw': os.path.getsize(path)}
+            for variant, suffix in (('gzip', '.gz'), ('brotli', '.br')):
+                # Files not worth compressing are served as-is
+                sizes[variant] = os.path.getsize(path + suffix) if os.path.exists(path + suffix) else sizes['raw']
+            extension = os.path.splitext(name)[1].lstrip('.').lower() or '(none)'
+            for kind in (extension, 'total'):
+                for variant in VARIANTS:
+                    totals[kind][variant] += sizes[variant]
+            assets.append((min(sizes.values()), hashed_name, sizes))
+
+        self.stdout.write(f'{"type":<10}{"raw KB":>12}{"gzip KB":>12}{"brotli KB":>12}')
+        for kind in sorted(totals, key=lambda kind: (kind == 'total', -totals[kind]['raw'])):
+            self.stdout.write(f'{kind:<10}' + ''.join(f'{totals[kind][variant] / 1024:>12.1f}' for variant in VARIANTS))
+
+        if options['top']:
+            self.stdout.write(f'\nLargest {options["top"]} assets (smallest encoding):')
+            for served, name, sizes in sorted(assets, reverse=True)[:options['top']]:
+                self.stdout.write(f'{served / 1024:>10.1f} KB  {name}  (raw {sizes["raw"] / 1024:.1f} KB)')
+
+        served = sum(served for served, *_ in assets)
+        summary = f'{len(assets)} assets, {served / 1024:.1f} KB served compressed, {totals["total"]["raw"] / 1024:.1f} KB raw'
+        if options['budget'] is not None and served > options['budget'] * 1024:
+            raise CommandError(f'{summary}: over the {options["budget"]} KB budget')
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,80 @@
+"""
+Prometheus metrics, served at ``/metrics``.
+
+Each gunicorn worker keeps its own values. When ``PROMETHEUS_MULTIPROC_DIR``
+is set (gunicorn.conf.py sets it up), workers write them to files in that
+directory and every scrape sums the files, whichever worker answers. The
+variable must be in the environment before ``prometheus_client`` is
+imported, not just in .env.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'store_request_duration_seconds', 'Time to produce a response, by URL name',
+    ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+ORDERS_CREATED = Counter('store_orders_created', 'Orders placed at checkout')
+PAYMENTS = Counter(
+    'store_payments', 'Paystack initializations, verifications and webhooks, by outcome',
+    ['operation', 'outcome'],
+)
+GATEWAY_LATENCY = Histogram(
+    'store_paystack_request_duration_seconds', 'Paystack API call time, retries included',
+    ['operation'], buckets=LATENCY_BUCKETS,
+)
+CART_MUTATIONS = Counter('store_cart_mutations', 'Cart lines added, updated or removed', ['action'])
+CACHE_LOOKUPS = Counter('store_cache_lookups', 'store.cache lookups by key prefix', ['prefix', 'result'])
+
+
+def record_request(request, response, seconds):
+    match = request.resolver_match
+    # URL names keep the label set small; unmatched paths (404s, probes) share one label
+    view = (match.url_name or match.view_name) if match else 'unmatched'
+    REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(seconds)
+
+
+def record_paystack(operation, outcome, seconds):
+    PAYMENTS.labels(operation, outcome).inc()
+    GATEWAY_LATENCY.labels(operation).observe(seconds)
+
+
+class MetricsMiddleware:
+    """Observe every response's latency under its URL name."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        record_request(request, response, time.perf_counter() - started)
+        return response
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponse(status=401)
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
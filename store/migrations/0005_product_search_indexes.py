@@ -0,0 +1,73 @@
+from django.db import DatabaseError, migrations
+
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_name_trgm_idx '
+    'ON store_product USING gin (name gin_trgm_ops)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_description_trgm_idx '
+    'ON store_product USING gin (description gin_trgm_ops)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX CONCURRENTLY IF EXISTS product_name_trgm_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS product_description_trgm_idx',
+]
+
+# External-content FTS5 table kept in sync with store_product by triggers
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS store_product_fts USING fts5("
+    "name, description, content='store_product', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS store_product_fts_ai AFTER INSERT ON store_product BEGIN "
+    "INSERT INTO store_product_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS store_product_fts_ad AFTER DELETE ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS store_product_fts_au AFTER UPDATE OF name, description ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO store_product_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO store_product_fts(store_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS store_product_fts_ai',
+    'DROP TRIGGER IF EXISTS store_product_fts_ad',
+    'DROP TRIGGER IF EXISTS store_product_fts_au',
+    'DROP TABLE IF EXISTS store_product_fts',
+]
+
+
+def run_statements(statements):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor not in statements:
+            return
+        with connection.cursor() as cursor:
+            for sql in statements[connection.vendor]:
+                try:
+                    cursor.execute(sql)
+                except DatabaseError:
+                    # SQLite builds without FTS5 fall back to LIKE search
+                    if connection.vendor != 'sqlite':
+                        raise
+                    return
+    return operation
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('store', '0004_product_catalog_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
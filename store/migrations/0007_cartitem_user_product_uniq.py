@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    # Fold any duplicate (user, product) lines into one before the constraint lands
+    CartItem = apps.get_model('store', 'CartItem')
+    duplicates = (
+        CartItem.objects.filter(user__isnull=False)
+        .values('user', 'product')
+        .annotate(lines=Count('id'), keep=Min('id'), quantity=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for duplicate in duplicates:
+        CartItem.objects.filter(pk=duplicate['keep']).update(quantity=duplicate['quantity'])
+        CartItem.objects.filter(user=duplicate['user'], product=duplicate['product']).exclude(
+            pk=duplicate['keep']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_product_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='cartitem_user_product_uniq'),
+        ),
+    ]
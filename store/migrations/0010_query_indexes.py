@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clear_blank_payment_ids(apps, schema_editor):
+    # Blank references would collide under the unique index; NULLs don't
+    Order = apps.get_model('store', 'Order')
+    Order.objects.filter(payment_id='').update(payment_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_order_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_blank_payment_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='order',
+            name='payment_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(condition=models.Q(('session_key__isnull', False)), fields=['session_key', 'product'], name='cartitem_session_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['stock'], name='product_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shippingaddress',
+            index=models.Index(condition=models.Q(('is_default', True)), fields=['user', '-created_at'], name='shippingaddress_default_idx'),
+        ),
+    ]
@@ -1,27 +1,121 @@
+from collections import Counter
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.db.models.functions import Substr
 from django.utils.text import slugify
 
+class ProductQuerySet(models.QuerySet):
+    # Columns rendered by the storefront product card
+    CARD_FIELDS = ('id', 'name', 'slug', 'price', 'image', 'image_variants', 'stock', 'created_at')
+
+    def for_listing(self):
+        return self.only(*self.CARD_FIELDS).annotate(
+            description_preview=Substr('description', 1, 101)
+        )
+
+    def base_slug(self, name):
+        """The slug ``name`` gets when nothing else has it yet."""
+        max_length = self.model._meta.get_field('slug').max_length
+        return slugify(name)[:max_length].strip('-') or 'product'
+
+    def unique_slugs(self, names, reserved=()):
+        """
+        Return a slug for each of ``names`` that is free in the table and within the batch.
+
+        Clashes get ``-2``, ``-3``... suffixes. Candidates are checked against the
+        unique slug index in bulk, so a batch costs a couple of queries however
+        many names collide. ``reserved`` slugs count as taken, e.g. ones claimed
+        by rows of the same batch that aren't saved yet.
+        """
+        max_length = self.model._meta.get_field('slug').max_length
+
+        def with_suffix(base, number):
+            tail = f'-{number}'
+            return base[:max_length - len(tail)].rstrip('-') + tail
+
+        bases = [self.base_slug(name) for name in names]
+        counts = Counter(bases)
+        reserved = set(reserved)
+        taken = set(self.filter(slug__in=counts).values_list('slug', flat=True)) | reserved
+        # Bases free in the table are used as-is by their first name
+        unused = {base for base in counts if base not in taken}
+        claimed = unused | reserved
+        needed = {base: count - (base in unused) for base, count in counts.items() if count - (base in unused)}
+        found = {base: [] for base in needed}
+        next_number = dict.fromkeys(needed, 2)
+
+        while needed:
+            candidates = {
+                base: [with_suffix(base, number) for number in range(next_number[base], next_number[base] + 2 * need)]
+                for base, need in needed.items()
+            }
+            in_use = set(
+                self.filter(slug__in=[slug for window in candidates.values() for slug in window])
+                .values_list('slug', flat=True)
+            )
+            for base, window in candidates.items():
+                next_number[base] += len(window)
+                for slug in window:
+                    if slug not in in_use and slug not in claimed:
+                        claimed.add(slug)
+                        found[base].append(slug)
+                        needed[base] -= 1
+                        if not needed[base]:
+                            del needed[base]
+                            break
+
+        free = {base: iter(slugs) for base, slugs in found.items()}
+        slugs = []
+        for base in bases:
+            if base in unused:
+                unused.discard(base)
+                slugs.append(base)
+            else:
+                slugs.append(next(free[base]))
+        return slugs
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Resized/WebP derivatives of ``image``, written by store.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     stock = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Backs keyset pagination of the storefront catalog
+            models.Index(fields=['-created_at', '-id'], name='product_catalog_idx'),
+            # Low-stock reports and the dashboard counter
+            models.Index(fields=['stock'], name='product_stock_idx'),
+            # The newest change, for the storefront's ETag
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets store.stats tell whether a save moved the product across the low-stock line
+        instance._loaded_stock = instance.__dict__.get('stock')
+        # Lets the cache signal drop the entry under a slug the save replaced
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = Product.objects.unique_slugs([self.name])[0]
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -29,7 +123,11 @@ class Product(models.Model):
 
     @property
     def short_description(self):
-        return self.description[:100] + '...' if len(self.description) > 100 else self.description
+        # Listing queries annotate a truncated preview instead of loading the full description
+        text = getattr(self, 'description_preview', None)
+        if text is None:
+            text = self.description
+        return text[:100] + '...' if len(text) > 100 else text
 
 class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -38,6 +136,20 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Target of the guest-cart merge upsert; NULL users (DB guest carts) never conflict
+            models.UniqueConstraint(fields=['user', 'product'], name='cartitem_user_product_uniq'),
+        ]
+        indexes = [
+            # Guest-cart lookups; user carts never set session_key
+            models.Index(
+                fields=['session_key', 'product'],
+                condition=models.Q(session_key__isnull=False),
+                name='cartitem_session_product_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
 
@@ -65,7 +177,7 @@ class Order(models.Model):
     shipping_address = models.TextField()
     
     # Payment
-    payment_id = models.CharField(max_length=100, blank=True, null=True)
+    payment_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
     payment_status = models.CharField(max_length=20, default='pending')
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -73,10 +185,23 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin order list: default ordering and its status/payment filters
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            models.Index(fields=['payment_status', '-created_at'], name='order_payment_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets store.stats tell whether a save moved the order in or out of pending
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -116,6 +241,14 @@ class ShippingAddress(models.Model):
 
     class Meta:
         ordering = ['-is_default', '-created_at']
+        indexes = [
+            # A user's default address, looked up at checkout
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_default=True),
+                name='shippingaddress_default_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.address_line_1}, {self.city}"
@@ -124,4 +257,18 @@ class ShippingAddress(models.Model):
         if self.is_default:
             # Ensure only one default address per user
             ShippingAddress.objects.filter(user=self.user, is_default=True).update(is_default=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class StoreStats(models.Model):
+    """Single-row counters for the admin dashboard, kept current by store.stats."""
+    total_products = models.PositiveIntegerField(default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    pending_orders = models.PositiveIntegerField(default=0)
+    low_stock_products = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'store stats'
+
+    def __str__(self):
+        return 'Store statistics'
@@ -0,0 +1,130 @@
+import uuid
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+
+from . import metrics, stats
+from .cache import invalidate_products
+from .models import CartItem, Order, OrderItem, Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, products):
+        self.products = products
+        super().__init__(', '.join(product.name for product in products))
+
+
+def place_order(user, cart_items, **shipping):
+    """
+    Turn ``cart_items`` (with products already loaded) into a paid-pending order.
+
+    Runs a fixed number of queries however many lines the cart has: one insert
+    for the order, one bulk insert for its items, one conditional stock update
+    and one cart delete. Raises ``InsufficientStock`` and rolls everything back
+    if any product can't cover its quantity.
+    """
+    quantities = Counter()
+    for item in cart_items:
+        quantities[item.product_id] += item.quantity
+    total = sum(item.total_price for item in cart_items)
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(user=user, total=total, payment_id=str(uuid.uuid4()), **shipping)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=item.product, quantity=item.quantity, price=item.product.price)
+                for item in cart_items
+            ])
+
+            # Decrement only rows that still have enough stock; a short count means a race was lost
+            in_stock = Q()
+            for product_id, quantity in quantities.items():
+                in_stock |= Q(pk=product_id, stock__gte=quantity)
+            updated = Product.objects.filter(in_stock).update(stock=Case(
+                *[When(pk=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()],
+                default=F('stock'),
+                output_field=PositiveIntegerField(),
+            ), updated_at=timezone.now())
+            if updated != len(quantities):
+                raise InsufficientStock([])
+
+            CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+            slugs = [item.product.slug for item in cart_items]
+            transaction.on_commit(lambda: invalidate_products(slugs))
+            transaction.on_commit(stats.refresh_low_stock)
+    except InsufficientStock:
+        # Re-read stock after the rollback to tell the shopper which lines are short
+        stock = dict(Product.objects.filter(pk__in=quantities).values_list('pk', 'stock'))
+        raise InsufficientStock([
+            item.product for item in cart_items
+            if stock.get(item.product_id, 0) < quantities[item.product_id]
+        ])
+    metrics.ORDERS_CREATED.inc()
+    return order
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def order_filters(q='', status=None, payment_status=None, date_from=None, date_to=None, prefix=''):
+    """
+    Return a ``Q`` for the admin order filters; ``prefix`` (e.g. ``'order__'``) reaches orders through a relation.
+
+    ``q`` is an order number, an exact email or part of a shipping email.
+    Dates are inclusive days, compared as datetime bounds on the bare
+    ``created_at`` column so the ``created_at`` indexes still apply.
+    """
+    def field(lookup):
+        return prefix + lookup
+
+    conditions = Q()
+    term = (q or '').strip().lstrip('#')
+    if term.isdigit():
+        conditions &= Q(**{field('id'): int(term)})
+    elif '@' in term:
+        conditions &= Q(**{field('shipping_email__iexact'): term}) | Q(**{field('user__email__iexact'): term})
+    elif term:
+        conditions &= Q(**{field('shipping_email__icontains'): term})
+    if status:
+        conditions &= Q(**{field('status'): status})
+    if payment_status:
+        conditions &= Q(**{field('payment_status'): payment_status})
+    if date_from:
+        conditions &= Q(**{field('created_at__gte'): start_of_day(date_from)})
+    if date_to:
+        conditions &= Q(**{field('created_at__lt'): start_of_day(date_to + timedelta(days=1))})
+    return conditions
+
+
+def mark_order_paid(reference, amount=None):
+    """
+    Record a successful payment for the order with ``payment_id=reference``.
+
+    Conditional UPDATEs only, so repeated webhooks and callbacks are no-ops.
+    ``amount`` (in pesewas) must match the order total when given. Returns
+    whether this call changed the order.
+    """
+    orders = Order.objects.filter(payment_id=reference).exclude(payment_status='completed')
+    if amount is not None:
+        orders = orders.filter(total=Decimal(amount) / 100)
+    now = timezone.now()
+    # Advance new orders to processing; never pull a shipped order back
+    advanced = orders.filter(status='pending').update(
+        payment_status='completed', status='processing', updated_at=now
+    )
+    others = orders.update(payment_status='completed', updated_at=now)
+    if advanced:
+        stats.apply_delta(pending_orders=-advanced)
+    return advanced + others > 0
+
+
+def mark_order_failed(reference):
+    return Order.objects.filter(payment_id=reference, payment_status='pending').update(
+        payment_status='failed',
+        updated_at=timezone.now(),
+    ) > 0
@@ -0,0 +1,212 @@
+"""
+Paystack API client.
+
+One pooled ``requests.Session`` per process, with connect/read timeouts and
+bounded retries on idempotent calls. ``AsyncPaystackClient`` offers the same
+calls for async views (requires ``httpx``). Point ``PAYSTACK_BASE_URL`` at a
+local stub server to exercise payments without reaching api.paystack.co.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics, timing
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class PaystackError(Exception):
+    pass
+
+
+@contextmanager
+def _timed(operation):
+    """Time a Paystack call; the body may set ``call['outcome']`` for the metrics."""
+    started = time.perf_counter()
+    call = {'outcome': 'ok'}
+    ok = False
+    try:
+        yield call
+        ok = True
+    finally:
+        elapsed = time.perf_counter() - started
+        timing.record('paystack', elapsed)
+        metrics.record_paystack(operation, call['outcome'] if ok else 'error', elapsed)
+        logger.info('paystack %s ok=%s %.1fms', operation, ok, elapsed * 1000)
+
+
+def _initialize_payload(order, callback_url):
+    return {
+        "email": order.shipping_email,
+        "amount": int(order.total * 100),  # Convert to pesewas for GHS
+        "currency": "GHS",
+        "reference": order.payment_id,
+        "callback_url": callback_url
+    }
+
+
+def _data(response, failure):
+    """Return the ``data`` of a successful JSON response; anything else raises ``PaystackError``."""
+    try:
+        body = response.json()
+    except ValueError:
+        # Gateways and load balancers answer outages with HTML
+        raise PaystackError(f"{failure}: HTTP {response.status_code} without a JSON body") from None
+    if not isinstance(body, dict):
+        raise PaystackError(f"{failure}: unexpected response {body!r}")
+    if not 200 <= response.status_code < 300:
+        raise PaystackError(f"{failure}: {body.get('message', 'No error message received')}")
+    if not isinstance(body.get('data'), dict):
+        raise PaystackError(f"{failure}: response has no data")
+    return body['data']
+
+
+def _authorization_url(response):
+    data = _data(response, "Payment initialization failed with Paystack")
+    if 'authorization_url' not in data:
+        raise PaystackError("Payment initialization failed with Paystack: no authorization URL")
+    return data['authorization_url']
+
+
+def _is_successful(response):
+    return _data(response, "Failed to verify payment").get('status') == 'success'
+
+
+class PaystackClient:
+    def __init__(self, secret_key=None, base_url=None, timeout=None, retries=None, pool_size=None):
+        self.base_url = (base_url or settings.PAYSTACK_BASE_URL).rstrip('/')
+        self.timeout = timeout or (settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT)
+        retries = settings.PAYSTACK_MAX_RETRIES if retries is None else retries
+        pool_size = pool_size or settings.PAYSTACK_POOL_SIZE
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {secret_key or settings.PAYSTACK_SECRET_KEY}",
+            "Content-Type": "application/json"
+        })
+        # Only GETs (verify) are retried; a repeated initialize could double-charge
+        retry = Retry(
+            total=retries,
+            backoff_factor=settings.PAYSTACK_RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount(self.base_url, adapter)
+
+    def initialize_transaction(self, order, callback_url):
+        """Start a transaction for ``order`` and return Paystack's checkout URL."""
+        with _timed('initialize'):
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/transaction/initialize",
+                    json=_initialize_payload(order, callback_url),
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as exc:
+                raise PaystackError(f"Paystack unreachable: {exc}") from exc
+            return _authorization_url(response)
+
+    def verify_transaction(self, reference):
+        """Return whether the transaction ``reference`` was paid successfully."""
+        with _timed('verify') as call:
+            try:
+                response = self.session.get(f"{self.base_url}/transaction/verify/{reference}", timeout=self.timeout)
+            except requests.RequestException as exc:
+                raise PaystackError(f"Paystack unreachable: {exc}") from exc
+            paid = _is_successful(response)
+            call['outcome'] = 'success' if paid else 'failed'
+            return paid
+
+
+class AsyncPaystackClient:
+    """``PaystackClient`` for async views, backed by a pooled ``httpx.AsyncClient``."""
+
+    def __init__(self, secret_key=None, base_url=None, timeout=None, retries=None, pool_size=None):
+        import httpx
+
+        self.retries = settings.PAYSTACK_MAX_RETRIES if retries is None else retries
+        connect, read = timeout or (settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT)
+        pool_size = pool_size or settings.PAYSTACK_POOL_SIZE
+        self.client = httpx.AsyncClient(
+            base_url=(base_url or settings.PAYSTACK_BASE_URL).rstrip('/'),
+            headers={
+                "Authorization": f"Bearer {secret_key or settings.PAYSTACK_SECRET_KEY}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def initialize_transaction(self, order, callback_url):
+        import httpx
+
+        with _timed('initialize'):
+            try:
+                response = await self.client.post('/transaction/initialize', json=_initialize_payload(order, callback_url))
+            except httpx.TransportError as exc:
+                raise PaystackError(f"Paystack unreachable: {exc!r}") from exc
+            return _authorization_url(response)
+
+    async def verify_transaction(self, reference):
+        import httpx
+
+        with _timed('verify') as call:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.get(f'/transaction/verify/{reference}')
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        break
+                except httpx.TransportError as exc:
+                    if attempt == self.retries:
+                        raise PaystackError(f"Paystack unreachable: {exc!r}") from exc
+                await asyncio.sleep(settings.PAYSTACK_RETRY_BACKOFF * (2 ** attempt))
+            paid = _is_successful(response)
+            call['outcome'] = 'success' if paid else 'failed'
+            return paid
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return this process's shared client, created on first use (after any fork)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
+
+
+def initiate_payment(order, callback_url):
+    return get_client().initialize_transaction(order, callback_url)
+
+
+def verify_payment(payment_id):
+    return get_client().verify_transaction(payment_id)
+
+
+def is_valid_signature(body, signature, secret_key=None):
+    """Check a webhook's ``x-paystack-signature``: hex HMAC-SHA512 of the raw body."""
+    if not signature:
+        return False
+    secret = (secret_key or settings.PAYSTACK_SECRET_KEY).encode()
+    expected = hmac.new(secret, body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
@@ -0,0 +1,131 @@
+import re
+
+from django.db import DatabaseError, connection, connections
+from django.db.models import Q
+
+from .models import Product
+
+FTS_TABLE = 'store_product_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Keep the FTS table in sync with store_product. Migration 0005 creates them
+# from its own frozen copy of this SQL; they are recreated from this one after
+# migrate, since SQLite drops them whenever store_product is rebuilt.
+FTS_TRIGGERS = {
+    'store_product_fts_ai': (
+        "CREATE TRIGGER IF NOT EXISTS store_product_fts_ai AFTER INSERT ON store_product BEGIN "
+        "INSERT INTO store_product_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END"
+    ),
+    'store_product_fts_ad': (
+        "CREATE TRIGGER IF NOT EXISTS store_product_fts_ad AFTER DELETE ON store_product BEGIN "
+        "INSERT INTO store_product_fts(store_product_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END"
+    ),
+    'store_product_fts_au': (
+        "CREATE TRIGGER IF NOT EXISTS store_product_fts_au AFTER UPDATE OF name, description ON store_product BEGIN "
+        "INSERT INTO store_product_fts(store_product_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO store_product_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END"
+    ),
+}
+
+
+def _fts_query(query):
+    # Prefix-match every word so partially typed terms still hit
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+
+def _postgres_search(queryset, query):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models.functions import Greatest
+
+    # Only %> (trigram word similarity) is served by the gin_trgm_ops indexes;
+    # icontains compiles to UPPER(col) LIKE, which would scan every description
+    return queryset.filter(
+        Q(name__trigram_word_similar=query) | Q(description__trigram_word_similar=query)
+    ).annotate(
+        rank=Greatest(
+            TrigramWordSimilarity(query, 'name'),
+            TrigramWordSimilarity(query, 'description') * 0.5,
+        )
+    ).order_by('-rank', '-created_at', '-id')
+
+
+def _sqlite_match_ids(query, limit):
+    match = _fts_query(query)
+    if not match:
+        return []
+    sql = (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s'
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, limit])
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError:
+        # FTS5 missing from this SQLite build; fall back to LIKE
+        return None
+
+
+def restore_sqlite_fts(using='default'):
+    """Recreate the FTS sync triggers and reindex if a table rebuild dropped them."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing or existing.issuperset(FTS_TRIGGERS):
+            return
+        for sql in FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def _sqlite_search(queryset, match):
+    # Join the FTS table so bm25() ranks every match in the same query, however many there are
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = store_product.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        select={'rank': f'bm25({FTS_TABLE}, 10.0, 1.0)'},
+        order_by=['rank', '-created_at', '-id'],
+    )
+
+
+def search_queryset(queryset, query):
+    """Filter ``queryset`` to products matching ``query``, best matches first."""
+    query = query.strip()
+    if not query:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, query)
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        match = _fts_query(query)
+        return _sqlite_search(queryset, match) if match else queryset.none()
+    return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+
+
+def search_products(query, limit=48):
+    """Return up to ``limit`` ranked products for the storefront search page."""
+    query = query.strip()
+    if not query:
+        return []
+    queryset = Product.objects.for_listing()
+    if connection.vendor == 'sqlite':
+        ids = _sqlite_match_ids(query, limit)
+        if ids is not None:
+            products = queryset.in_bulk(ids)
+            return [products[pk] for pk in ids if pk in products]
+    return list(search_queryset(queryset, query)[:limit])
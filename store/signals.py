@@ -0,0 +1,57 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import stats
+from .cache import invalidate_products
+from .cart import CART_COUNT_SESSION_KEY, merge_guest_cart
+from .models import Order, Product
+from .search import restore_sqlite_fts
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    # Wait for commit so a concurrent request can't re-cache the old row
+    slugs = {instance.slug, getattr(instance, '_loaded_slug', None)} - {None}
+    instance._loaded_slug = instance.slug
+    transaction.on_commit(lambda: invalidate_products(slugs))
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, created, raw=False, **kwargs):
+    # Fixture loads are recounted with `manage.py rebuild_store_stats`
+    if not raw:
+        stats.product_saved(instance, created)
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    stats.product_deleted(instance)
+
+
+@receiver(post_save, sender=Order)
+def count_saved_order(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        stats.order_saved(instance, created)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    stats.order_deleted(instance)
+
+
+@receiver(user_logged_in)
+def adopt_guest_cart(sender, request, user, **kwargs):
+    # The session's badge count described the guest cart; recount for the user
+    if request is not None and hasattr(request, 'session'):
+        merge_guest_cart(request, user)
+        request.session.pop(CART_COUNT_SESSION_KEY, None)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    # SQLite rebuilds store_product for some schema changes, dropping its FTS triggers
+    if sender.name == 'store':
+        restore_sqlite_fts(using)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Order, Product, StoreStats
+
+STATS_PK = 1
+
+
+def _is_low(stock):
+    return stock is not None and stock <= settings.LOW_STOCK_THRESHOLD
+
+
+def rebuild_stats():
+    """Recount everything from scratch: one conditional aggregate per table."""
+    products = Product.objects.aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(stock__lte=settings.LOW_STOCK_THRESHOLD)),
+    )
+    orders = Order.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+    stats, _ = StoreStats.objects.update_or_create(pk=STATS_PK, defaults={
+        'total_products': products['total'],
+        'low_stock_products': products['low_stock'],
+        'total_orders': orders['total'],
+        'pending_orders': orders['pending'],
+    })
+    return stats
+
+
+def get_stats():
+    stats = StoreStats.objects.filter(pk=STATS_PK).first()
+    return stats or rebuild_stats()
+
+
+def apply_delta(**deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        # After commit, so a checkout doesn't hold the single stats row's lock
+        # for the rest of its transaction and serialize every other checkout
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def _apply(deltas):
+    # Clamp at zero: rows loaded from fixtures are never counted in but are
+    # counted out on delete, and a negative value would fail the delete itself
+    updated = StoreStats.objects.filter(pk=STATS_PK).update(
+        updated_at=timezone.now(),
+        **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    )
+    if not updated:
+        rebuild_stats()
+
+
+def refresh_low_stock():
+    """Recount low-stock products after bulk stock updates that bypass signals."""
+    low_stock = Product.objects.filter(stock__lte=settings.LOW_STOCK_THRESHOLD).count()
+    if not StoreStats.objects.filter(pk=STATS_PK).update(low_stock_products=low_stock, updated_at=timezone.now()):
+        rebuild_stats()
+
+
+def product_saved(product, created):
+    previous = getattr(product, '_loaded_stock', None)
+    if created:
+        apply_delta(total_products=1, low_stock_products=int(_is_low(product.stock)))
+    elif previous is None:
+        refresh_low_stock()
+    else:
+        apply_delta(low_stock_products=int(_is_low(product.stock)) - int(_is_low(previous)))
+    product._loaded_stock = product.stock
+
+
+def product_deleted(product):
+    apply_delta(total_products=-1, low_stock_products=-int(_is_low(product.stock)))
+
+
+def order_saved(order, created):
+    previous = getattr(order, '_loaded_status', None)
+    if created:
+        apply_delta(total_orders=1, pending_orders=int(order.status == 'pending'))
+    elif previous is not None:
+        apply_delta(pending_orders=int(order.status == 'pending') - int(previous == 'pending'))
+    order._loaded_status = order.status
+
+
+def order_deleted(order):
+    apply_delta(total_orders=-1, pending_orders=-int(order.status == 'pending'))
@@ -0,0 +1,44 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from ..images import derivative_name
+
+register = template.Library()
+
+
+def _srcset(image_name, widths, extension):
+    return ', '.join(
+        f'{default_storage.url(derivative_name(image_name, width, extension))} {width}w'
+        for width in widths
+    )
+
+
+@register.simple_tag
+def product_image(product, sizes='100vw', css_class='', style='', alt=None):
+    """
+    Render ``product.image`` as a ``<picture>`` with WebP/JPEG ``srcset``.
+
+    Falls back to the original upload until derivatives have been generated.
+    """
+    alt = product.name if alt is None else alt
+    variants = product.image_variants or {}
+    if variants.get('source') != product.image.name or not variants.get('widths'):
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" style="{}" loading="lazy">',
+            product.image.url, css_class, alt, style,
+        )
+
+    name, widths = product.image.name, variants['widths']
+    placeholder_style = (
+        f"background-image: url({variants['placeholder']}); background-size: cover; {style}"
+    )
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" style="{}" loading="lazy" decoding="async">'
+        '</picture>',
+        _srcset(name, widths, 'webp'), sizes,
+        default_storage.url(derivative_name(name, widths[0], 'jpg')),
+        _srcset(name, widths, 'jpg'), sizes, css_class, alt, placeholder_style,
+    )
@@ -0,0 +1,146 @@
+"""
+Per-request timing: SQL, template rendering and Paystack calls.
+
+``RequestTimingMiddleware`` collects the numbers for each request and sends
+them back in a ``Server-Timing`` header, which browser dev tools show under
+the request's Timing tab. Requests slower than ``SLOW_REQUEST_MS`` are also
+logged as one JSON line, along with the statements they ran most often.
+
+Template time is measured by ``TimedDjangoTemplates``, the template backend
+configured in settings. Anything else can be timed with ``timed(name)``.
+Each of these costs a couple of ``perf_counter()`` calls, so the middleware
+stays on in production. It only sees queries run before the response is
+returned; a streamed body's queries are not counted.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+# Statements reported in a slow request's log line
+SLOW_LOG_STATEMENTS = 3
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """What one request spent, in seconds, per kind of work."""
+
+    def __init__(self):
+        self.queries = 0
+        self.durations = {'db': 0.0}
+        # SQL text -> [executions, seconds]; parameters are ignored so N+1 loops group together
+        self.statements = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """``execute_wrapper`` hook counting and timing each query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.durations['db'] += elapsed
+            statement = self.statements.setdefault(sql, [0, 0.0])
+            statement[0] += 1
+            statement[1] += elapsed
+
+    def repeated_statements(self, limit=SLOW_LOG_STATEMENTS):
+        """The statements run more than once, most total time first."""
+        repeated = sorted(
+            ((seconds, count, sql) for sql, (count, seconds) in self.statements.items() if count > 1),
+            reverse=True,
+        )
+        return [
+            {'count': count, 'ms': round(seconds * 1000, 1), 'sql': sql[:500]}
+            for seconds, count, sql in repeated[:limit]
+        ]
+
+    def server_timing(self, total):
+        metrics = [f'total;dur={total * 1000:.1f}', f'db;dur={self.durations["db"] * 1000:.1f};desc="{self.queries} queries"']
+        metrics += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.durations.items() if name != 'db']
+        return ', '.join(metrics)
+
+
+def record(name, seconds):
+    """Add ``seconds`` under ``name`` to the current request's timings, if there is one."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, recording render time as ``tpl``."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class RequestTimingMiddleware:
+    """Add a ``Server-Timing`` header to every response and log slow requests."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        response.headers['Server-Timing'] = timings.server_timing(total)
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            match = request.resolver_match
+            logger.warning('slow request %s', json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'queries': timings.queries,
+                **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in timings.durations.items()},
+                'repeated_sql': timings.repeated_statements(),
+            }))
+        return response
@@ -1,10 +1,13 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .metrics import metrics_view
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('metrics', metrics_view, name='metrics'),
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('search/', views.search, name='search'),
     path('cart/', views.cart, name='cart'),
     path('add-to-cart/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
     path('update-cart/<int:item_id>/', views.update_cart, name='update_cart'),
@@ -12,8 +15,10 @@ urlpatterns = [
     path('checkout/', views.checkout, name='checkout'),
     path('payment/initialize/<int:order_id>/', views.initialize_payment, name='initialize_payment'),
     path('payment/callback/', views.payment_callback, name='payment_callback'),
+    path('payment/webhook/', views.payment_webhook, name='payment_webhook'),
     path('order-confirmation/<int:order_id>/', views.order_confirmation, name='order_confirmation'),
     path('profile/', views.profile, name='profile'),
+    path('profile/orders/', views.order_history, name='order_history'),
     path('profile/address/delete/<int:address_id>/', views.delete_shipping_address, name='delete_shipping_address'),
     path('profile/address/default/<int:address_id>/', views.set_default_address, name='set_default_address'),
     
@@ -29,6 +34,7 @@ urlpatterns = [
     path('admin-dashboard/products/edit/<int:product_id>/', views.admin_edit_product, name='admin_edit_product'),
     path('admin-dashboard/products/delete/<int:product_id>/', views.admin_delete_product, name='admin_delete_product'),
     path('admin-dashboard/orders/', views.admin_orders, name='admin_orders'),
+    path('admin-dashboard/orders/export/', views.admin_export_orders, name='admin_export_orders'),
     path('admin-dashboard/orders/<int:order_id>/', views.admin_order_detail, name='admin_order_detail'),
     path('admin-dashboard/orders/<int:order_id>/update-status/', views.admin_update_order_status, name='admin_update_order_status'),
     path('admin-dashboard/low-stock/', views.admin_low_stock, name='admin_low_stock'),
@@ -1,96 +1,120 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.db.models import Sum, Count
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Sum, Count, Prefetch, OuterRef, Subquery
+from django.core.paginator import Paginator
 from django.conf import settings
-from .models import Product, CartItem, Order, OrderItem, UserProfile, ShippingAddress
-from .forms import SignUpForm, CheckoutForm, UserProfileForm, ShippingAddressForm, QuickCheckoutForm, ProductForm
+from django.utils import timezone
+from .models import Product, Order, OrderItem, UserProfile, ShippingAddress
+from .forms import SignUpForm, CheckoutForm, UserProfileForm, ShippingAddressForm, QuickCheckoutForm, ProductForm, OrderFilterForm, ProductFilterForm
+from .pagination import paginate_keyset, decode_cursor
+from . import cache as catalog_cache
+from .conditional import catalog_etag, product_etag
+from .search import search_products, search_queryset
+from .images import schedule_derivatives
+from .orders import place_order, mark_order_paid, mark_order_failed, order_filters, InsufficientStock
+from .paystack import initiate_payment, verify_payment, is_valid_signature
+from .stats import get_stats
+from .exports import EXPORT_FORMATS, order_item_rows, stream_export
+from .cart import get_cart, add_item, update_item, remove_item, set_cart_count
+from .metrics import CART_MUTATIONS, PAYMENTS
 import json
-import requests
-import uuid
+import logging
 
+logger = logging.getLogger(__name__)
+
+# Revalidate every time: the page is per user
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=catalog_etag)
 def home(request):
-    products = Product.objects.all()
-    return render(request, 'store/home.html', {'products': products})
+    cursor = request.GET.get('after')
+    if cursor and not decode_cursor(cursor):
+        cursor = None
+
+    def build_grid():
+        page = paginate_keyset(Product.objects.for_listing(), cursor=cursor, page_size=settings.CATALOG_PAGE_SIZE)
+        return mark_safe(render_to_string('store/partials/product_cards.html', {'products': page, 'page': page}).strip())
+
+    grid = catalog_cache.catalog_grid(cursor, build_grid)
+    # Infinite scroll fetches only the next batch of cards
+    if request.GET.get('partial'):
+        return HttpResponse(grid)
+    return render(request, 'store/home.html', {'grid': grid})
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=product_etag)
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug)
+    def build_fragment():
+        product = get_object_or_404(Product, slug=slug)
+        context = {'product': product}
+        return {
+            'id': product.id,
+            'name': product.name,
+            'slug': product.slug,
+            'stock': product.stock,
+            'gallery': render_to_string('store/partials/product_gallery.html', context),
+            'summary': render_to_string('store/partials/product_summary.html', context),
+        }
+
+    product = catalog_cache.product_fragment(slug, build_fragment)
     return render(request, 'store/product_detail.html', {'product': product})
 
-def get_cart_items(request):
-    if request.user.is_authenticated:
-        return CartItem.objects.filter(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        return CartItem.objects.filter(session_key=session_key)
+@catalog_cache.cache_view('catalog')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    products = search_products(query, limit=settings.SEARCH_RESULTS_LIMIT) if query else []
+    return render(request, 'store/search.html', {'query': query, 'products': products})
 
 @require_POST
 def add_to_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
     quantity = int(request.POST.get('quantity', 1))
-    
-    if request.user.is_authenticated:
-        cart_item, created = CartItem.objects.get_or_create(
-            user=request.user,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        cart_item, created = CartItem.objects.get_or_create(
-            session_key=session_key,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-    
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
-    
+    add_item(request, product, quantity)
+    CART_MUTATIONS.labels('add').inc()
     messages.success(request, f'{product.name} added to cart!')
     return redirect('product_detail', slug=product.slug)
 
 def cart(request):
-    cart_items = get_cart_items(request)
-    total = sum(item.total_price for item in cart_items)
+    summary = get_cart(request)
     return render(request, 'store/cart.html', {
-        'cart_items': cart_items,
-        'total': total
+        'cart': summary,
+        'cart_items': summary.lines,
+        'total': summary.subtotal,
     })
 
 @require_POST
 def update_cart(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id)
     quantity = int(request.POST.get('quantity', 1))
+    if not update_item(request, item_id, quantity):
+        raise Http404('Cart item not found')
+    CART_MUTATIONS.labels('update' if quantity > 0 else 'remove').inc()
     
     if quantity > 0:
-        cart_item.quantity = quantity
-        cart_item.save()
         messages.success(request, 'Cart updated!')
     else:
-        cart_item.delete()
         messages.success(request, 'Item removed from cart!')
     
     return redirect('cart')
 
 @require_POST
 def remove_from_cart(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id)
-    cart_item.delete()
+    if not remove_item(request, item_id):
+        raise Http404('Cart item not found')
+    CART_MUTATIONS.labels('remove').inc()
     messages.success(request, 'Item removed from cart!')
     return redirect('cart')
 
 def checkout(request):
-    cart_items = get_cart_items(request)
+    # Load every line with its product once; the page and the order both reuse it
+    summary = get_cart(request)
+    cart_items = summary.lines
     if not cart_items:
         messages.error(request, 'Your cart is empty!')
         return redirect('cart')
@@ -100,7 +124,7 @@ def checkout(request):
         messages.info(request, 'Please log in or create an account to proceed with checkout.')
         return redirect(f'/login/?next=/checkout/')
     
-    total = sum(item.total_price for item in cart_items)
+    total = summary.subtotal
     
     # Get user's saved shipping addresses
     shipping_addresses = request.user.shipping_addresses.all() if hasattr(request.user, 'shipping_addresses') else []
@@ -109,40 +133,33 @@ def checkout(request):
     if request.method == 'POST':
         form = QuickCheckoutForm(request.POST, user=request.user)
         if form.is_valid():
-            # Create order
-            order = Order(user=request.user, total=total, payment_id=str(uuid.uuid4()))
-            
             # Handle shipping information
             selected_address = form.cleaned_data.get('shipping_address')
             if selected_address:
                 # Use saved address
-                order.shipping_name = selected_address.name
-                order.shipping_email = selected_address.email
-                order.shipping_phone = selected_address.phone
-                order.shipping_address = f"{selected_address.address_line_1}, {selected_address.address_line_2}, {selected_address.city}, {selected_address.state}, {selected_address.postal_code}, {selected_address.country}".replace(', ,', ',').strip(', ')
+                shipping = {
+                    'shipping_name': selected_address.name,
+                    'shipping_email': selected_address.email,
+                    'shipping_phone': selected_address.phone,
+                    'shipping_address': f"{selected_address.address_line_1}, {selected_address.address_line_2}, {selected_address.city}, {selected_address.state}, {selected_address.postal_code}, {selected_address.country}".replace(', ,', ',').strip(', '),
+                }
             else:
                 # Use manually entered address
-                order.shipping_name = form.cleaned_data['shipping_name']
-                order.shipping_email = form.cleaned_data['shipping_email']
-                order.shipping_phone = form.cleaned_data['shipping_phone']
-                order.shipping_address = form.cleaned_data['shipping_address']
-            
-            order.save()
-            
-            # Create order items and reduce stock
-            for cart_item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price
-                )
-                # Reduce product stock
-                cart_item.product.stock -= cart_item.quantity
-                cart_item.product.save()
+                shipping = {
+                    'shipping_name': form.cleaned_data['shipping_name'],
+                    'shipping_email': form.cleaned_data['shipping_email'],
+                    'shipping_phone': form.cleaned_data['shipping_phone'],
+                    'shipping_address': form.cleaned_data['shipping_address'],
+                }
             
-            # Clear cart
-            cart_items.delete()
+            # Create order, order items, reduce stock and clear cart in one transaction
+            try:
+                order = place_order(request.user, cart_items, **shipping)
+            except InsufficientStock as e:
+                names = ', '.join(product.name for product in e.products)
+                messages.error(request, f'Sorry, there is not enough stock for: {names}. Please update your cart.')
+                return redirect('cart')
+            set_cart_count(request, 0)
             
             # Redirect to payment initialization
             return redirect('initialize_payment', order_id=order.id)
@@ -154,6 +171,7 @@ def checkout(request):
         form = QuickCheckoutForm(initial=initial_data, user=request.user)
     
     return render(request, 'store/checkout.html', {
+        'cart': summary,
         'form': form,
         'cart_items': cart_items,
         'total': total,
@@ -168,8 +186,8 @@ def order_confirmation(request, order_id):
 
 @login_required
 def profile(request):
-    # Get or create user profile
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    # The profile row is only written once the user saves the form
+    profile = UserProfile.objects.filter(user=request.user).first() or UserProfile(user=request.user)
     
     # Handle profile form submission
     if request.method == 'POST' and 'profile_form' in request.POST:
@@ -213,8 +231,8 @@ def profile(request):
     else:
         address_form = ShippingAddressForm()
     
-    # Get user's orders and shipping addresses
-    orders = Order.objects.filter(user=request.user)
+    # Recent orders only; the full history lives on its own paginated page
+    orders = order_history_queryset(request.user)[:settings.PROFILE_RECENT_ORDERS]
     shipping_addresses = ShippingAddress.objects.filter(user=request.user)
     
     context = {
@@ -227,6 +245,26 @@ def profile(request):
     
     return render(request, 'store/profile.html', context)
 
+def order_history_queryset(user):
+    # Item counts come from a per-order subquery (which the paginator's COUNT skips);
+    # items and their products from one prefetch
+    item_count = (
+        OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+        .annotate(total=Sum('quantity')).values('total')
+    )
+    return Order.objects.filter(user=user).annotate(item_count=Subquery(item_count)).prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+    ).order_by('-created_at', '-id')
+
+@login_required
+def order_history(request):
+    paginator = Paginator(order_history_queryset(request.user), settings.ORDER_HISTORY_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'store/order_history.html', {
+        'orders': page_obj.object_list,
+        'page_obj': page_obj,
+    })
+
 @login_required
 @require_POST
 def delete_shipping_address(request, address_id):
@@ -296,16 +334,18 @@ def payment_callback(request):
     
     try:
         order = Order.objects.get(payment_id=ref)
-        if verify_payment(ref):
-            order.payment_status = 'completed'
-            order.status = 'processing'
-            order.save()
-            
+        # The webhook usually records the payment before the shopper gets here;
+        # only ask Paystack directly if it hasn't arrived yet
+        paid = order.payment_status == 'completed'
+        if not paid and verify_payment(ref):
+            paid = True
+            mark_order_paid(ref)
+        
+        if paid:
             messages.success(request, f'Payment successful! Order #{order.id} confirmed.')
             return redirect('order_confirmation', order_id=order.id)
         else:
-            order.payment_status = 'failed'
-            order.save()
+            mark_order_failed(ref)
             messages.error(request, 'Payment verification failed')
             return redirect('order_confirmation', order_id=order.id)
     except Order.DoesNotExist:
@@ -315,37 +355,33 @@ def payment_callback(request):
         messages.error(request, f'Payment verification error: {str(e)}')
         return redirect('home')
 
-def initiate_payment(order, callback_url):
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "email": order.shipping_email,
-        "amount": int(order.total * 100),  # Convert to pesewas for GHS
-        "currency": "GHS",
-        "reference": order.payment_id,
-        "callback_url": callback_url
-    }
-    response = requests.post("https://api.paystack.co/transaction/initialize", headers=headers, json=data)
-    if response.status_code == 200:
-        data = response.json()['data']
-        return data['authorization_url']
-    else:    
-        error_message = response.json().get('message', 'No error message received')
-        raise Exception(f"Payment initialization failed with Paystack: {error_message}")
-
-def verify_payment(payment_id):
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-    response = requests.get(f"https://api.paystack.co/transaction/verify/{payment_id}", headers=headers)
-    if response.status_code == 200:
-        data = response.json()['data']
-        return data['status'] == 'success'
-    else:
-        raise Exception("Failed to verify payment")
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    if not is_valid_signature(request.body, request.headers.get('x-paystack-signature')):
+        return HttpResponse(status=401)
+    try:
+        event = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+    if not isinstance(event, dict):
+        return HttpResponse(status=400)
+    
+    if event.get('event') == 'charge.success':
+        data = event.get('data')
+        if not isinstance(data, dict):
+            return HttpResponse(status=400)
+        reference, amount = data.get('reference'), data.get('amount')
+        # The amount (in pesewas) is always checked against the order total
+        if type(amount) is not int:
+            return HttpResponse(status=400)
+        changed = bool(reference) and mark_order_paid(reference, amount)
+        PAYMENTS.labels('webhook', 'success' if changed else 'ignored').inc()
+        if reference and not changed:
+            logger.info('Paystack webhook for %s changed nothing (already paid, unknown or amount mismatch)', reference)
+    
+    # Acknowledge every verified event so Paystack stops retrying
+    return HttpResponse(status=200)
 
 # Admin Dashboard Views
 def is_admin(user):
@@ -353,32 +389,55 @@ def is_admin(user):
 
 @user_passes_test(is_admin, login_url='login')
 def admin_dashboard(request):
-    # Get statistics
-    total_products = Product.objects.count()
-    total_orders = Order.objects.count()
-    pending_orders = Order.objects.filter(status='pending').count()
-    low_stock_products = Product.objects.filter(stock__lte=10).count()
+    # Counters are maintained incrementally by store.stats; this is a single-row read
+    stats = get_stats()
 
     # Recent orders
-    recent_orders = Order.objects.all()[:5]
+    recent_orders = Order.objects.select_related('user')[:5]
 
     # Low stock products
-    low_stock = Product.objects.filter(stock__lte=10)[:5]
+    low_stock = Product.objects.filter(stock__lte=settings.LOW_STOCK_THRESHOLD)[:5]
 
     context = {
-        'total_products': total_products,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'low_stock_products': low_stock_products,
+        'total_products': stats.total_products,
+        'total_orders': stats.total_orders,
+        'pending_orders': stats.pending_orders,
+        'low_stock_products': stats.low_stock_products,
         'recent_orders': recent_orders,
         'low_stock': low_stock,
+        'cache_stats': catalog_cache.cache_stats(),
     }
     return render(request, 'store/admin/dashboard.html', context)
 
+def paginate(request, queryset):
+    paginator = Paginator(queryset, settings.ADMIN_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    # Keep the active filters on the page links
+    query = request.GET.copy()
+    query.pop('page', None)
+    return page_obj, query.urlencode()
+
 @user_passes_test(is_admin, login_url='login')
 def admin_products(request):
-    products = Product.objects.all().order_by('-created_at')
-    return render(request, 'store/admin/products.html', {'products': products})
+    products = Product.objects.for_listing().order_by('-created_at', '-id')
+    filter_form = ProductFilterForm(request.GET)
+    if filter_form.is_valid():
+        search_term = filter_form.cleaned_data['q']
+        if search_term:
+            # Best matches first
+            products = search_queryset(products, search_term)
+        if filter_form.cleaned_data['stock'] == 'low':
+            products = products.filter(stock__lte=settings.LOW_STOCK_THRESHOLD)
+        elif filter_form.cleaned_data['stock'] == 'out':
+            products = products.filter(stock=0)
+
+    page_obj, filter_query = paginate(request, products)
+    return render(request, 'store/admin/products.html', {
+        'products': page_obj.object_list,
+        'page_obj': page_obj,
+        'filter_form': filter_form,
+        'filter_query': filter_query,
+    })
 
 @user_passes_test(is_admin, login_url='login')
 def admin_add_product(request):
@@ -386,6 +445,8 @@ def admin_add_product(request):
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
             product = form.save()
+            if product.image:
+                schedule_derivatives(product)
             messages.success(request, f'Product "{product.name}" added successfully!')
             return redirect('admin_products')
     else:
@@ -399,6 +460,8 @@ def admin_edit_product(request, product_id):
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
             product = form.save()
+            if product.image and 'image' in form.changed_data:
+                schedule_derivatives(product)
             messages.success(request, f'Product "{product.name}" updated successfully!')
             return redirect('admin_products')
     else:
@@ -416,8 +479,40 @@ def admin_delete_product(request, product_id):
 
 @user_passes_test(is_admin, login_url='login')
 def admin_orders(request):
-    orders = Order.objects.all().order_by('-created_at')
-    return render(request, 'store/admin/orders.html', {'orders': orders})
+    orders = Order.objects.select_related('user')
+    filter_form = OrderFilterForm(request.GET)
+    if filter_form.is_valid():
+        orders = orders.filter(order_filters(**filter_form.cleaned_data))
+
+    page_obj, filter_query = paginate(request, orders.order_by('-created_at'))
+    return render(request, 'store/admin/orders.html', {
+        'orders': page_obj.object_list,
+        'page_obj': page_obj,
+        'filter_form': filter_form,
+        'filter_query': filter_query,
+    })
+
+@user_passes_test(is_admin, login_url='login')
+def admin_export_orders(request):
+    filter_form = OrderFilterForm(request.GET)
+    if not filter_form.is_valid():
+        return HttpResponse('Invalid export filters', status=400)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse('Unsupported export format', status=400)
+
+    data = filter_form.cleaned_data
+    rows = order_item_rows(
+        q=data['q'],
+        status=data['status'],
+        payment_status=data['payment_status'],
+        date_from=data['date_from'],
+        date_to=data['date_to'],
+    )
+    response = StreamingHttpResponse(stream_export(rows, export_format), content_type=EXPORT_FORMATS[export_format])
+    filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @user_passes_test(is_admin, login_url='login')
 def admin_order_detail(request, order_id):
@@ -439,11 +534,11 @@ def admin_update_order_status(request, order_id):
 
 @user_passes_test(is_admin, login_url='login')
 def admin_low_stock(request):
-    low_stock_threshold = request.GET.get('threshold', 10)
+    low_stock_threshold = request.GET.get('threshold', settings.LOW_STOCK_THRESHOLD)
     try:
         low_stock_threshold = int(low_stock_threshold)
     except ValueError:
-        low_stock_threshold = 10
+        low_stock_threshold = settings.LOW_STOCK_THRESHOLD
 
     products = Product.objects.filter(stock__lte=low_stock_threshold).order_by('stock')
     return render(request, 'store/admin/low_stock.html', {